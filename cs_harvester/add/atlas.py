@@ -11,12 +11,13 @@
 """
 
 import os
+import re
 import sys
 import sqlite3
 import argparse
-from glob import glob
 from packaging.version import Version
 
+import numpy as np
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 import astropy.units as u
@@ -36,9 +37,9 @@ from sbsearch.logging import ProgressTriangle
 from sbn_survey_image_service.data.add import add_label as add_label_to_sbnsis
 from sbn_survey_image_service.services.database_provider import data_provider_session
 
-from ..lidvid import LIDVID, collection_version
+from ..lidvid import LIDVID, collection_version_from_file, lidvid_from_file
 from ..logger import get_logger, setup_logger
-from ..collection import labels_from_inventory
+from ..collection import labels_from_inventory, scan_xml_files
 from ..harvest_log import HarvestLog
 from ..exceptions import ConcurrentHarvesting
 from ..process import process
@@ -49,7 +50,8 @@ def open_validation_database(fn) -> sqlite3.Connection:
 
     try:
         db = sqlite3.connect(f"file:{fn}?mode=ro", uri=True)
-        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA mmap_size=268435456")
+        db.execute("PRAGMA cache_size=-65536")
     except Exception as exc:
         logger.error("Could not connect to database %s", fn)
         raise exc
@@ -65,37 +67,75 @@ def validated_collections_from_db(db, start, stop):
 
     """
 
+    # only fetch the columns used downstream; an index-friendly range
+    # predicate lets sqlite use an index on recorded_at, if one exists
+    #
     # we're having an issue with rounding error, so add a ms to start
     cursor = db.execute(
-        """SELECT * FROM nn
+        """SELECT nn, location, recorded_at FROM nn
            WHERE current_status = 'validated'
-             AND recorded_at > ? AND recorded_at < ?
+             AND recorded_at BETWEEN ? AND ?
            ORDER BY recorded_at
         """,
         (start.unix + 1e-3, stop.unix),
     )
-    return list(cursor.fetchall())
+    cursor.arraysize = 1000
+    return list(cursor)
 
 
-def latest_collection(files):
-    """Search list of xml files for collections and return the highest versioned collection."""
+def find_collection_files(location: str, night_number: int) -> list[str]:
+    return scan_xml_files(f"/n/{location}", prefix=f"collection_{night_number}")
+
+
+# image product LIDs of interest, e.g., ...:01a59613o0586o.fits::1.0
+_FITS_OR_DIFF_LID = re.compile(r"\.(fits|diff)::[^:]+$")
+
+# version number encoded in a collection file name, e.g., collection_59613_v1.2.xml
+_COLLECTION_FILE_VERSION = re.compile(r"_v(\d+(?:\.\d+)*)\.xml$")
+
+
+def latest_collection_file(files):
+    """Search list of xml files for collections and return the highest versioned one."""
 
+    # fast path: compare version numbers encoded in the file names, when all
+    # files have one
+    versioned = []
+    for fn in files:
+        match = _COLLECTION_FILE_VERSION.search(fn)
+        if match is None:
+            versioned = None
+            break
+        versioned.append((Version(match.group(1)), fn))
+
+    if versioned:
+        return max(versioned)[1]
+
+    # otherwise, stream the version_id from each label
     latest = None
     max_version = Version("0")
     for fn in files:
-        struct = pds4_tools.read(fn, quiet=True, lazy_load=True)
-        version = collection_version(struct.label)
+        version = collection_version_from_file(fn)
 
         if version > max_version:
-            latest = struct
+            latest = fn
             max_version = version
 
     return latest
 
 
+def latest_collection(files):
+    """Read the highest versioned collection from a list of xml files."""
+
+    latest = latest_collection_file(files)
+
+    if latest is None:
+        return None
+
+    return pds4_tools.read(latest, quiet=True, lazy_load=True)
+
+
 def find_collection(location: str, night_number: int) -> StructureList:
-    files = glob(f"/n/{location}/collection_{night_number}*.xml")
-    return latest_collection(files)
+    return latest_collection(find_collection_files(location, night_number))
 
 
 def get_observation(catch, label) -> ATLAS:
@@ -120,6 +160,7 @@ def get_observation(catch, label) -> ATLAS:
 
 def process_collection_for_catch(
     collection: StructureList,
+    lidvid: LIDVID,
     location: str,
     timestamp: str,
     harvest_log: HarvestLog,
@@ -129,8 +170,6 @@ def process_collection_for_catch(
 
     logger = get_logger()
 
-    lidvid = LIDVID.from_label(collection.label)
-
     # Find image products in the data directory
     data_directory = os.path.normpath(f"/n/{location}/data")
     logger.debug(
@@ -140,16 +179,19 @@ def process_collection_for_catch(
 
     logger.info("%s, %s", lidvid, data_directory)
 
-    # identify image labels of interest
-    candidate_labels = [
-        _lidvid
-        for _lidvid in collection[0].data["LIDVID_LID"]
-        if _lidvid[: _lidvid.rindex(":") - 1].endswith(".fits")
-    ]
+    # identify image labels of interest: filter on the LID (the portion
+    # before the "::") with vectorized string operations; np.char raises on
+    # zero-size arrays, so keep an empty inventory out of it
+    lidvids = np.asarray(collection[0].data["LIDVID_LID"])
+    if len(lidvids) > 0:
+        lids = np.char.rpartition(lidvids, "::")[:, 0]
+        candidate_labels = lidvids[np.char.endswith(lids, ".fits")].tolist()
+    else:
+        candidate_labels = []
     try:
         labels = labels_from_inventory(
             candidate_labels,
-            glob(f"{data_directory}/*fits.xml"),
+            scan_xml_files(data_directory, suffixes="fits.xml"),
             error_if_incomplete=True,
         )
     except ValueError as exc:
@@ -162,25 +204,6 @@ def process_collection_for_catch(
         duplicates = 0
         errors = 0
         observations = []
-        tri: ProgressTriangle = ProgressTriangle(1, logger)
-        for fn, label in labels:
-            tri.update()
-            try:
-                obs = None
-                if update:
-                    try:
-                        obs = get_observation(catch, label)
-                        duplicates += 1
-                    except NoResultFound:
-                        # then just add it
-                        pass
-
-                observations.append(process(label, "atlas", obs))
-            except Exception as exc:
-                logger.error(": ".join((str(exc), fn)))
-                errors += 1
-
-        tri.done()
 
         def add_or_update(catch, observations):
             try:
@@ -195,7 +218,8 @@ def process_collection_for_catch(
                 )
                 raise
 
-        if not config.dry_run:
+        def flush():
+            nonlocal added
             try:
                 add_or_update(catch, observations)
                 added += len(observations)
@@ -205,14 +229,42 @@ def process_collection_for_catch(
                 harvest_log.write()
                 raise exc
 
-            logger.info("Updating survey statistics.")
-            for source in (
-                "atlas_mauna_loa",
-                "atlas_haleakela",
-                "atlas_rio_hurtado",
-                "atlas_sutherland",
-            ):
-                stats.update_statistics(catch, source=source)
+            observations.clear()
+
+        tri: ProgressTriangle = ProgressTriangle(1, logger)
+        processed = 0
+        mjd_added = Time.now().mjd
+        for fn, label in labels:
+            # batch the progress updates to keep them off the hot path
+            processed += 1
+            if processed % 1024 == 0:
+                tri.update(1024)
+            try:
+                obs = None
+                if update:
+                    try:
+                        obs = get_observation(catch, label)
+                        duplicates += 1
+                    except NoResultFound:
+                        # then just add it
+                        pass
+
+                observations.append(process(label, "atlas", obs, mjd_added))
+            except Exception as exc:
+                logger.error(": ".join((str(exc), fn)))
+                errors += 1
+
+            # save in batches to bound memory use and start the insert
+            # pipeline before the whole collection is parsed
+            if not config.dry_run and len(observations) >= 500:
+                flush()
+
+        tri.update(processed % 1024)
+        tri.done()
+
+        # save any remaining observations
+        if not config.dry_run and len(observations) > 0:
+            flush()
 
     logger.info("%d files processed", tri.i)
     logger.info("%d files added", added)
@@ -228,11 +280,12 @@ def process_collection_for_catch(
         harvest_log.data[-1]["time_of_last"],
         timestamp,
     )
-    harvest_log.write()
+    harvest_log.maybe_write()
 
 
 def process_collection_for_sbnsis(
     collection: StructureList,
+    lidvid: LIDVID,
     location: str,
     timestamp: str,
     harvest_log: HarvestLog,
@@ -244,8 +297,6 @@ def process_collection_for_sbnsis(
     if not os.path.exists(".env"):
         raise FileNotFoundError("Missing sbnsis .env file")
 
-    lidvid = LIDVID.from_label(collection.label)
-
     # Find image products in the data directory
     data_directory = os.path.normpath(f"/n/{location}/data")
     logger.debug(
@@ -255,15 +306,17 @@ def process_collection_for_sbnsis(
 
     logger.info("%s, %s", lidvid, data_directory)
 
-    # identify image labels of interest
-    product_lidvids = [LIDVID(row) for row in collection[0].data["LIDVID_LID"]]
+    # identify image labels of interest: test the LID suffix directly on the
+    # inventory strings, no LIDVID objects needed for a filter
     candidate_labels = [
-        str(lv) for lv in product_lidvids if lv.lid.endswith((".fits", ".diff"))
+        row
+        for row in collection[0].data["LIDVID_LID"]
+        if _FITS_OR_DIFF_LID.search(row)
     ]
     try:
         labels = labels_from_inventory(
             candidate_labels,
-            glob(f"{data_directory}/*fits.xml") + glob(f"{data_directory}/*diff.xml"),
+            scan_xml_files(data_directory, suffixes=("fits.xml", "diff.xml")),
             error_if_incomplete=True,
         )
     except ValueError as exc:
@@ -275,17 +328,26 @@ def process_collection_for_sbnsis(
     duplicates = 0
     errors = 0
     tri: ProgressTriangle = ProgressTriangle(1, logger)
+    processed = 0
     with data_provider_session() as sbnsis:
         for fn, label in labels:
-            tri.update()
+            # batch the progress updates to keep them off the hot path
+            processed += 1
+            if processed % 1024 == 0:
+                tri.update(1024)
             try:
                 success = add_label_to_sbnsis(fn, sbnsis, dry_run=config.dry_run)
                 added += success
                 duplicates += not success
+                # commit in batches rather than once per label to cut the
+                # number of fsyncs; the session context commits the rest
+                if success and added % 500 == 0:
+                    sbnsis.commit()
             except Exception as exc:
                 logger.error(": ".join((str(exc), fn)))
                 errors += 1
 
+    tri.update(processed % 1024)
     tri.done()
 
     logger.info("%d files processed", tri.i)
@@ -302,7 +364,7 @@ def process_collection_for_sbnsis(
         harvest_log.data[-1]["time_of_last"],
         timestamp,
     )
-    harvest_log.write()
+    harvest_log.maybe_write()
 
 
 def time_string_or_float(t: str) -> Time:
@@ -438,50 +500,86 @@ def main():
 
     if args.list:
         logger.info("Listing %d collections to process", len(results))
-        for i, row in enumerate(results):
-            collection = find_collection(row["location"], row["nn"])
-            print(LIDVID.from_label(collection.label))
+        for nn, location, recorded_at in results:
+            # a streaming read of the identification fields is all that a
+            # listing needs
+            fn = latest_collection_file(find_collection_files(location, nn))
+            if fn is not None:
+                print(lidvid_from_file(fn))
 
         logger.info("Finished")
         return
 
     harvest_log.write()  # write "processing" state to the log
 
-    for i, row in enumerate(results):
-        collection = find_collection(row["location"], row["nn"])
+    # track the remaining --only-process LIDVIDs as a set of strings for
+    # constant time membership tests and removal
+    only_process: set[str] | None = None
+    if config.only_process is not None:
+        only_process = {str(lv) for lv in config.only_process}
+
+    # convert the validation times in one vectorized call; constructing a
+    # scalar Time per row runs ERFA once per object
+    timestamps = Time(
+        [recorded_at for _, _, recorded_at in results], format="unix", precision=6
+    ).iso
+
+    for i, (nn, location, recorded_at) in enumerate(results):
         n = len(results) - i
 
-        lidvid = LIDVID.from_label(collection.label)
-        if config.only_process is not None:
-            if lidvid in config.only_process:
-                # use list of remaining lidvids from command line as the count
-                n = len(config.only_process)
-            else:
+        if only_process is not None:
+            # peek at the collection LIDVID with a cheap streaming read
+            # before committing to a full collection read
+            fn = latest_collection_file(find_collection_files(location, nn))
+            if fn is None or str(lidvid_from_file(fn)) not in only_process:
                 continue
 
+            # use list of remaining lidvids from command line as the count
+            n = len(only_process)
+            collection = pds4_tools.read(fn, quiet=True, lazy_load=True)
+        else:
+            collection = find_collection(location, nn)
+
+        lidvid = LIDVID.from_label(collection.label)
+
         logger.info("%d collections to process.", n)
 
         if config.target == "catch":
             process_collection_for_catch(
                 collection,
-                row["location"],
-                Time(row["recorded_at"], format="unix", precision=6).iso,
+                lidvid,
+                location,
+                timestamps[i],
                 harvest_log,
                 args.update,
             )
         else:
             process_collection_for_sbnsis(
                 collection,
-                row["location"],
-                Time(row["recorded_at"], format="unix", precision=6).iso,
+                lidvid,
+                location,
+                timestamps[i],
                 harvest_log,
             )
 
-        if config.only_process is not None:
-            config.only_process.pop(config.only_process.index(lidvid))
-            if len(config.only_process) == 0:
+        if only_process is not None:
+            only_process.discard(str(lidvid))
+            if len(only_process) == 0:
                 break
 
+    # survey statistics only need one update per harvest run, not one per
+    # collection
+    if config.target == "catch" and not config.dry_run:
+        logger.info("Updating survey statistics.")
+        with Catch.with_config(config.catch_config) as catch:
+            for source in (
+                "atlas_mauna_loa",
+                "atlas_haleakela",
+                "atlas_rio_hurtado",
+                "atlas_sutherland",
+            ):
+                stats.update_statistics(catch, source=source)
+
     logger.info("Processing complete.")
     logger.info("%d files processed", harvest_log.data[-1]["files"])
     logger.info("%d files added", harvest_log.data[-1]["added"])
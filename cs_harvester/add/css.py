@@ -7,27 +7,35 @@ harvesting.
 """
 
 import os
-import re
 import sys
-from time import sleep
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import email
-import urllib
 import argparse
 import logging
+import shutil
 import sqlite3
 import gzip
-from datetime import datetime
+import io
+from datetime import datetime, timezone
 from contextlib import contextmanager
 
 from astropy.time import Time
-from pds4_tools import pds4_read
+
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+from pds4_tools.reader.label_objects import Label
+from pds4_tools.reader.read_label import read_label as parse_label
 
 from catch import Catch, stats
 from sbsearch.logging import ProgressTriangle
 
 from ..logger import get_logger, setup_logger
 from ..harvest_log import HarvestLog
-from ..exceptions import ConcurrentHarvesting, LabelError
+from ..exceptions import ConcurrentHarvesting
 from ..process import process
 from .. import network
 
@@ -41,6 +49,10 @@ ARCHIVE_PREFIX = "https://sbnarchive.psi.edu/pds4/surveys/"
 
 
 DB_SETUP = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
     """
     CREATE TABLE IF NOT EXISTS labels (
         path TEXT,
@@ -102,10 +114,15 @@ def sync_list():
     local_filename = "css-file-list.txt.gz"
     sync = False
 
-    if os.path.exists(local_filename):
+    try:
         # file exists, check for an update
         last_sync = datetime.fromtimestamp(os.stat(local_filename).st_mtime)
+    except FileNotFoundError:
+        # file does not exist, download new file
+        last_sync = None
+        sync = True
 
+    if last_sync is not None:
         with network.session() as session:
             response = session.head(LATEST_FILES)
 
@@ -123,9 +140,6 @@ def sync_list():
                 logger.info("New file list available.")
         except KeyError:
             pass
-    else:
-        # file does not exist, download new file
-        sync = True
 
     if sync:
         with network.session() as session:
@@ -137,44 +151,60 @@ def sync_list():
                 logger.info("Downloaded file list.")
 
                 stat = os.stat(local_filename)
-                file_date = Time(stat.st_mtime, format="unix")
+                file_date = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
                 logger.info(f"  Size: {stat.st_size / 1048576:.2f} MiB")
-                logger.info(f"  Last modified: {file_date.iso}")
+                logger.info(
+                    "  Last modified: %s", file_date.strftime("%Y-%m-%d %H:%M:%S")
+                )
 
                 backup_file = local_filename.replace(
                     ".txt.gz",
-                    "-"
-                    + file_date.isot[:16].replace("-", "").replace(":", "")
-                    + ".txt.gz",
+                    file_date.strftime("-%Y%m%dT%H%M") + ".txt.gz",
                 )
-                os.system(f"cp {local_filename} {backup_file}")
+                shutil.copyfile(local_filename, backup_file)
 
     return local_filename
 
 
+def label_from_bytes(content: bytes) -> Label:
+    """Parse a PDS4 label already in memory.
+
+    Only the label XML is read, skipping pds4_read's data structure
+    discovery, which is not needed for metadata harvesting.
+
+    """
+
+    convenient_root, convenient_namespace_map = parse_label(
+        io.BytesIO(content),
+        strip_extra_whitespace=True,
+        enforce_default_prefixes=True,
+        include_namespace_map=True,
+    )
+    unmodified_root, unmodified_namespace_map = parse_label(
+        io.BytesIO(content),
+        strip_extra_whitespace=False,
+        enforce_default_prefixes=False,
+        include_namespace_map=True,
+    )
+    return Label(
+        convenient_root=convenient_root,
+        unmodified_root=unmodified_root,
+        convenient_namespace_map=convenient_namespace_map,
+        unmodified_namespace_map=unmodified_namespace_map,
+    )
+
+
 def read_label(path):
-    logger = get_logger()
     url = "".join((ARCHIVE_PREFIX, path))
 
-    attempts = 0
-    # address timeout error by retrying with a delay
-    while attempts < 6:
-        try:
-            with network.set_astropy_useragent():
-                label = pds4_read(url, lazy_load=True, quiet=True).label
-            break
-        except urllib.error.URLError as e:
-            logger.error(str(e))
-            attempts += 1
-            sleep(3)  # retry, but not too soon
-    else:
-        raise LabelError("5 failed attempts reading " + url)
-
-    return label
+    # transient errors are retried by the session's adapter
+    response = network.get_session().get(url, timeout=60)
+    response.raise_for_status()
+    return label_from_bytes(response.content)
 
 
-def new_labels(db, listfile):
-    """Iterator for new labels.
+def new_paths(db, listfile):
+    """Iterator for label paths not yet harvested.
 
 
     Parameters
@@ -196,22 +226,33 @@ def new_labels(db, listfile):
     line_count: int = 0
     calibrated_count: int = 0
     processed_count: int = 0
-    with gzip.open(listfile, "rt") as inf:
+
+    # one scan of the tracking table beats a SELECT per file-list line
+    seen = {row[0] for row in db.execute("SELECT path FROM labels")}
+
+    if rapidgzip is not None:
+        # decompress in parallel across cores
+        stream = rapidgzip.open(listfile, parallelization=os.cpu_count())
+    else:
+        # a large read buffer amortizes the zlib calls over bigger chunks
+        # than gzip.open's default
+        stream = io.BufferedReader(gzip.open(listfile, "rb"), buffer_size=262144)
+
+    with io.TextIOWrapper(stream, encoding="ascii", newline="") as inf:
         for line in inf:
             line_count += 1
-            if re.match(".*data_calibrated/.*\.xml\n$", line):
+            if "data_calibrated/" in line and line.endswith(".xml\n"):
                 if "collection" in line:
                     continue
                 calibrated_count += 1
-                path = line.strip()
-                path = path[line.find("gbo.ast.catalina.survey") :]  # noqa E203
-                processed = db.execute(
-                    "SELECT TRUE FROM labels WHERE path = ?", (path,)
-                ).fetchone()
-                if processed is None:
+                _, sep, tail = line.partition("gbo.ast.catalina.survey")
+                if not sep:
+                    continue
+                path = (sep + tail).rstrip()
+                if path not in seen:
+                    seen.add(path)
                     processed_count += 1
-                    label = read_label(path)
-                    yield path, label
+                    yield path
 
     logger = logging.getLogger("add-css")
     logger.info("Processed:")
@@ -220,6 +261,42 @@ def new_labels(db, listfile):
     logger.info("  %d new files", processed_count)
 
 
+def new_labels(db, listfile):
+    """Iterator for new labels.
+
+    Label fetches are prefetched with a thread pool over a bounded sliding
+    window; results are yielded in file-list order.
+
+
+    Parameters
+    ----------
+    db : sqlite3.Connection
+        Database of ingested labels (``harvester_db``).
+
+    listfile : str
+        Look for new labels in this file.
+
+    Returns
+    -------
+    path : str
+    label : pds4_tools.reader.label_objects.Label
+
+    """
+
+    paths = new_paths(db, listfile)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        queue = deque(
+            (path, executor.submit(read_label, path))
+            for path in itertools.islice(paths, 64)
+        )
+        while queue:
+            path, future = queue.popleft()
+            for next_path in itertools.islice(paths, 1):
+                queue.append((next_path, executor.submit(read_label, next_path)))
+
+            yield path, future.result()
+
+
 def main():
     from .. import config
 
@@ -260,11 +337,13 @@ def main():
             harvest_log.write()
 
             observations = []
+            pending_labels = []
             failed = 0
+            mjd_added = Time.now().mjd
             tri = ProgressTriangle(1, logger=logger, base=2)
             for path, label in new_labels(db, listfile):
                 try:
-                    observations.append(process(label, "css"))
+                    observations.append(process(label, "css", mjd_added=mjd_added))
                     msg = "added"
                 except ValueError as e:
                     failed += 1
@@ -284,25 +363,30 @@ def main():
                 if args.dry_run:
                     continue
 
-                db.execute(
-                    "INSERT INTO labels VALUES (?,?,?)", (path, Time.now().iso, msg)
-                )
+                pending_labels.append((path, Time.now().iso, msg))
 
-                if len(observations) >= 10000:
+                if len(observations) >= config.observation_batch_size:
                     catch.add_observations(observations)
+                    db.executemany(
+                        "INSERT INTO labels VALUES (?,?,?)", pending_labels
+                    )
                     db.commit()
+                    pending_labels.clear()
 
                     # update harvest log
                     harvest_log.data[-1]["files"] = tri.i
                     harvest_log.data[-1]["added"] += len(observations)
                     harvest_log.data[-1]["errors"] = failed
-                    harvest_log.write()
+                    harvest_log.maybe_write()
 
-                    observations = []
+                    observations.clear()
 
             # add any remaining files
             if len(observations) > 0:
                 catch.add_observations(observations)
+
+            if len(pending_labels) > 0:
+                db.executemany("INSERT INTO labels VALUES (?,?,?)", pending_labels)
                 db.commit()
 
             if failed > 0:
@@ -317,12 +401,24 @@ def main():
 
             if not config.dry_run:
                 logger.info("Updating survey statistics.")
-                for source in (
-                    "catalina_bigelow",
-                    "catalina_lemmon",
-                    "catalina_bokneosurvey",
-                ):
-                    stats.update_statistics(catch, source=source)
+
+                def update_statistics(source):
+                    # one Catch instance per thread: sessions are not
+                    # thread safe
+                    with Catch.with_config(args.catch_config) as catch:
+                        stats.update_statistics(catch, source=source)
+
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    list(
+                        executor.map(
+                            update_statistics,
+                            (
+                                "catalina_bigelow",
+                                "catalina_lemmon",
+                                "catalina_bokneosurvey",
+                            ),
+                        )
+                    )
 
 
 if __name__ == "__main__":
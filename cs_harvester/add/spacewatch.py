@@ -22,23 +22,31 @@ wget -r -R *.fits --no-parent https://sbnarchive.psi.edu/pds4/surveys/gbo.ast.sp
 """
 
 import os
+import logging
 import argparse
 
+import numpy as np
+from astropy.time import Time
 from sqlalchemy.orm.exc import NoResultFound
-import pds4_tools
 
 from catch import Catch, stats
 from catch.model.spacewatch import Spacewatch
 from sbsearch.logging import ProgressTriangle
-from ..lidvid import LIDVID
+from ..lidvid import lidvid_from_file
 from ..logger import setup_logger
-from ..collection import labels_from_inventory, case_insensitive_find_xml_file
+from ..collection import (
+    collection_inventory,
+    labels_from_inventory,
+    case_insensitive_find_xml_file,
+)
 from ..process import process
-from .. import network
+
+
+_LID_XPATH = "Identification_Area/logical_identifier"
 
 
 def get_observation(catch, label) -> Spacewatch:
-    lid = label.find("Identification_Area/logical_identifier").text
+    lid = label.find(_LID_XPATH).text
     obs = catch.db.session.query(Spacewatch).filter(Spacewatch.product_id == lid).one()
     return obs
 
@@ -84,37 +92,47 @@ def main():
     args = get_arguments()
     logger = setup_logger()
 
-    with network.set_astropy_useragent():
-        collection = pds4_tools.read(args.collection, quiet=True, lazy_load=True)
-
-    lidvid = LIDVID.from_label(collection.label)
+    lidvid = lidvid_from_file(args.collection)
     logger.info("Processing collection %s", lidvid)
     if args.vid is not None:
         logger.info("Only processing labels with version ID == %s", args.vid)
 
-    lidvids: list[str]
+    lidvids = np.asarray(collection_inventory(args.collection))
     if args.diff is not None:
-        this = set(collection[0].data["LIDVID_LID"])
-
-        other_collection = pds4_tools.read(args.diff, quiet=True, lazy_load=True)
-        other = set(other_collection[0].data["LIDVID_LID"])
-
-        lidvids = list(this - other)
+        other = np.asarray(collection_inventory(args.diff))
+
+        # C-level sorted merge; inventory LIDVIDs are unique by construction
+        lidvids = np.setdiff1d(lidvids, other, assume_unique=True)
+
+    # split the inventory into lid and vid columns with vectorized string
+    # operations rather than a LIDVID object per row; np.char raises on
+    # zero-size arrays (e.g., an exhaustive --diff or unmatched --vid), so
+    # keep empties out of it
+    if len(lidvids) > 0:
+        parts = np.char.rpartition(lidvids, "::")
+        lids = parts[:, 0]
+        vids = parts[:, 2]
+
+        if args.vid is not None:
+            keep = vids == args.vid
+            lidvids = lidvids[keep]
+            lids = lids[keep]
+    else:
+        lids = lidvids
+
+    if len(lids) > 0:
+        product_ids = np.char.rpartition(lids, ":")[:, 2]
+    else:
+        product_ids = lids
 
     base_path = os.path.dirname(args.collection)
-    inventory = []
+    inventory = lidvids.tolist()
     files = set()
-    for row in lidvids:
-        lidvid = LIDVID(row)
-        if args.vid is not None and lidvid.vid != args.vid:
-            continue
-
-        inventory.append(row)
-
-        y, m, d = lidvid.product_id.split("_")[-6:-3]
+    for product_id in product_ids.tolist():
+        y, m, d = product_id.split("_")[-6:-3]
 
         fn = case_insensitive_find_xml_file(
-            f"{base_path}/{y}/{m}/{d}/{lidvid.product_id[:-4]}xml"
+            f"{base_path}/{y}/{m}/{d}/{product_id[:-4]}xml"
         )
         files.add(fn)
 
@@ -137,10 +155,14 @@ def main():
         observations = []
         failed = 0
 
+        debug = logger.isEnabledFor(logging.DEBUG)
+        mjd_added = Time.now().mjd
+
         tri = ProgressTriangle(1, logger=logger, base=2)
         for fn, label in labels_from_inventory(inventory, files):
             tri.update()
-            logger.debug("(%d) %s", tri.i, fn)
+            if debug:
+                logger.debug("(%d) %s", tri.i, fn)
 
             obs = None
             if args.update:
@@ -151,7 +173,7 @@ def main():
                     pass
 
             try:
-                obs = process(label, config.source, obs)
+                obs = process(label, config.source, obs, mjd_added)
                 observations.append(obs)
                 msg = "updating" if args.update else "adding"
             except ValueError as e:
@@ -161,14 +183,15 @@ def main():
                 logger.error("A fatal error occurred processing %s", fn, exc_info=True)
                 raise
 
-            logger.debug("... %s", msg)
+            if debug:
+                logger.debug("... %s", msg)
 
             if config.dry_run:
                 continue
 
-            if len(observations) >= 8192:
+            if len(observations) >= config.observation_batch_size:
                 add_or_update(observations)
-                observations = []
+                observations.clear()
 
         # add any remaining files
         if not config.dry_run and (len(observations) > 0):
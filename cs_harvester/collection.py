@@ -1,11 +1,101 @@
 import os
-from glob import glob
+import csv
+import functools
+import hashlib
+import itertools
+import pickle
 from typing import Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 import pds4_tools
-from .lidvid import LIDVID
+from .exceptions import LabelError
+from .lidvid import LIDVID, lidvid_from_file
 from .logger import get_logger
 
 
+_cache_directory = os.path.expanduser("~/.cache/cs_harvester")
+
+
+def collection_inventory(fn: str) -> list[str]:
+    """Read a collection's inventory LIDVIDs.
+
+    The inventory file name is taken from the collection label's
+    File_Area_Inventory with a streaming parse, and the inventory CSV is
+    read directly, avoiding a full pds4_tools ingestion of the collection.
+    The parsed LIDVIDs are persisted under ``~/.cache/cs_harvester``, keyed
+    on the CSV's modification time and size, so re-runs over the same
+    collection (e.g., with ``--diff``) skip the scan.
+
+
+    Parameters
+    ----------
+    fn : str
+        The collection label file name.
+
+
+    Returns
+    -------
+    lidvids : list of str
+
+    """
+
+    inventory_fn: str | None = None
+    for _, element in etree.iterparse(
+        fn, events=("end",), tag="{*}File_Area_Inventory"
+    ):
+        inventory_fn = element.findtext("{*}File/{*}file_name")
+        break
+
+    if inventory_fn is None:
+        raise LabelError(f"File_Area_Inventory/File/file_name not found in {fn}")
+
+    inventory_path = os.path.join(os.path.dirname(fn), inventory_fn)
+    stat = os.stat(inventory_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache_file = os.path.join(
+        _cache_directory, hashlib.sha1(inventory_path.encode()).hexdigest() + ".pkl"
+    )
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, lidvids = pickle.load(f)
+        if cached_key == key:
+            return lidvids
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    lidvids: list[str] = []
+    with open(inventory_path, newline="") as f:
+        for row in csv.reader(f):
+            if row:
+                lidvids.append(row[1])
+
+    try:
+        os.makedirs(_cache_directory, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump((key, lidvids), f)
+    except OSError:
+        pass
+
+    return lidvids
+
+
+def _normalized_stem(name: str) -> str:
+    """Normalize a file name or product_id for stem comparison.
+
+    Product ids and file names differ in suffix style, e.g., the ATLAS
+    product_id "01a59613o0586o_fits" is the label file
+    "01a59613o0586o.fits.xml".
+
+    """
+
+    stem = os.path.basename(name).lower()
+    if stem.endswith(".xml"):
+        stem = stem[:-4]
+    return stem.replace(".", "_")
+
+
 def labels_from_inventory(
     inventory: list[str],
     files: list[str],
@@ -38,26 +128,160 @@ def labels_from_inventory(
 
     # yield all .xml labels with lidvids in the inventory
     remaining = set(inventory)
+
+    # match inventory product_ids to file name stems so that, usually, only
+    # the matched files need to be read at all
+    by_stem: dict[str, str] = {}
     for fn in files:
-        try:
-            label = pds4_tools.read(fn, quiet=True, lazy_load=True).label
-        except Exception as exc:
-            msg = str(exc)
-            logger.error("%s", msg + ("" if fn in msg else (":" + fn)))
-            continue
-
-        lidvid = str(LIDVID.from_label(label))
-        if lidvid in remaining:
-            remaining -= set([lidvid])
-            yield fn, label
-
-    if len(remaining) > 0:
+        by_stem.setdefault(_normalized_stem(fn), fn)
+
+    matched: list[str] = []
+    for lidvid in remaining:
+        stem = _normalized_stem(LIDVID(lidvid).product_id)
+        fn = by_stem.get(stem)
+        if fn is None and stem.endswith("_fits"):
+            # Spacewatch file names omit the product_id's .fits suffix
+            fn = by_stem.get(stem[:-5])
+        if fn is not None:
+            matched.append(fn)
+
+    if len(matched) == len(remaining):
+        scan_files = matched
+    else:
+        # some inventory entries did not match a file name stem: scan the
+        # rest of the file list for them, matched files first
+        matched_set = set(matched)
+        scan_files = matched + [fn for fn in files if fn not in matched_set]
+
+    def read(fn):
+        # peek at the LIDVID with a streaming parse; only labels matching the
+        # inventory are worth a full pds4_tools read
+        lidvid = str(lidvid_from_file(fn))
+        if lidvid not in remaining:
+            return lidvid, None
+        return lidvid, pds4_tools.read(fn, quiet=True, lazy_load=True).label
+
+    # prefetch a few reads ahead of the consumer so that label I/O overlaps
+    # with the consumer's processing
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        file_iterator = iter(scan_files)
+        queue = deque(
+            (fn, executor.submit(read, fn))
+            for fn in itertools.islice(file_iterator, 8)
+        )
+        while queue:
+            fn, future = queue.popleft()
+            for next_fn in itertools.islice(file_iterator, 1):
+                queue.append((next_fn, executor.submit(read, next_fn)))
+
+            try:
+                lidvid, label = future.result()
+            except Exception as exc:
+                msg = str(exc)
+                logger.error("%s", msg + ("" if fn in msg else (":" + fn)))
+                continue
+
+            if label is not None and lidvid in remaining:
+                remaining.discard(lidvid)
+                yield fn, label
+
+    if error_if_incomplete and len(remaining) > 0:
         raise ValueError(
             "Not all inventory LIDVIDs were found: {}".format(", ".join(remaining))
         )
 
 
-case_insensitive_find_file_lists: dict[str, dict[str, str]] = {}
+_xml_file_lists: dict[str, tuple[int, list[str]]] = {}
+
+
+def scan_xml_files(
+    directory: str, prefix: str = "", suffixes: str | tuple[str, ...] = ".xml"
+) -> list[str]:
+    """List XML files in a directory with a single scan.
+
+    The directory is read with ``os.scandir``, avoiding the per-entry stat
+    calls made by ``glob``, and the listing is cached, keyed on the
+    directory's modification time, so that repeated scans of the same
+    directory do not touch the filesystem again.
+
+
+    Parameters
+    ----------
+    directory : str
+        The directory to scan.
+
+    prefix : str, optional
+        Only return files with this name prefix.
+
+    suffixes : str or tuple of str, optional
+        Only return files with these name suffixes.
+
+
+    Returns
+    -------
+    files : list of str
+        Full paths to the matching files.
+
+    """
+
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    cached = _xml_file_lists.get(directory)
+    if cached is None or cached[0] != mtime:
+        with os.scandir(directory) as entries:
+            names = sorted(entry.name for entry in entries if entry.is_file())
+        _xml_file_lists[directory] = (mtime, names)
+    else:
+        names = cached[1]
+
+    return [
+        os.path.join(directory, name)
+        for name in names
+        if name.startswith(prefix) and name.endswith(suffixes)
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _lowercase_xml_index(dir: str) -> dict[str, str]:
+    """Map lowercased to actual XML file names in ``dir``.
+
+    The listing is read once with ``os.scandir`` and persisted under
+    ``~/.cache/cs_harvester``, keyed on the directory's modification time, so
+    that repeated runs over a static archive skip the scan entirely.
+
+    """
+
+    mtime = os.stat(dir).st_mtime_ns
+    cache_file = os.path.join(
+        _cache_directory, hashlib.sha1(dir.encode()).hexdigest() + ".pkl"
+    )
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_mtime, index = pickle.load(f)
+        if cached_mtime == mtime:
+            return index
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    with os.scandir(dir) as entries:
+        index = {
+            entry.name.lower(): entry.name
+            for entry in entries
+            if entry.name.endswith(("xml", "XML"))
+        }
+
+    try:
+        os.makedirs(_cache_directory, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump((mtime, index), f)
+    except OSError:
+        pass
+
+    return index
 
 
 def case_insensitive_find_xml_file(fn: str) -> str:
@@ -79,14 +303,7 @@ def case_insensitive_find_xml_file(fn: str) -> str:
     """
 
     dir = os.path.dirname(fn)
-
-    # only read the files once:
-    if dir not in case_insensitive_find_file_lists:
-        case_insensitive_find_file_lists[dir] = {
-            _fn.lower(): _fn for _fn in glob(f"{dir}/*xml")
-        }
-
     try:
-        return case_insensitive_find_file_lists[dir][fn]
-    except KeyError:
+        return os.path.join(dir, _lowercase_xml_index(dir)[os.path.basename(fn)])
+    except (KeyError, FileNotFoundError):
         raise FileNotFoundError(fn)
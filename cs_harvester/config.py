@@ -13,6 +13,7 @@ dry_run: bool = False
 catch_config: CatchConfig | None = None
 runtime_log_filename: str = ""
 only_process: list[str] | None = None
+observation_batch_size: int = 50000
 
 
 def add_arguments(parser):
@@ -1,5 +1,8 @@
 import os
-from astropy.table import Table, Column
+import time
+import shutil
+import numpy as np
+from astropy.table import Table
 from astropy.time import Time
 from .exceptions import ConcurrentHarvesting
 
@@ -8,6 +11,7 @@ class HarvestLog:
     """File that tracks harvest runs and results."""
 
     def __init__(self):
+        self._last_write: float = 0.0
         self.read()
 
     def read(self) -> None:
@@ -29,10 +33,8 @@ class HarvestLog:
             )
             # enforce string field widths
             for col, dtype in zip(self.data.colnames[:5], dtypes[:5]):
-                if self.data[col].dtype == dtype:
-                    continue
-
-                self.data.replace_column(col, Column(self.data[col].data, dtype=dtype))
+                if self.data[col].dtype != dtype:
+                    self.data[col] = self.data[col].astype(dtype)
         else:
             self.data = Table(
                 names=[
@@ -49,7 +51,7 @@ class HarvestLog:
                 dtype=dtypes,
             )
 
-        if any(self.data["end"] == "processing"):
+        if (self.data["end"] == "processing").any():
             raise ConcurrentHarvesting()
 
     def write(self) -> None:
@@ -64,19 +66,43 @@ class HarvestLog:
         if config.dry_run:
             return
 
-        os.system(
-            f"cp -f --backup=numbered {config.harvest_log_filename} {config.harvest_log_filename}"
-        )
+        # rotate the numbered backups, keeping the last 5
+        fn = config.harvest_log_filename
+        for i in range(5, 0, -1):
+            if os.path.exists(f"{fn}.~{i}~"):
+                os.replace(f"{fn}.~{i}~", f"{fn}.~{i + 1}~")
+        if os.path.exists(fn):
+            shutil.copy2(fn, f"{fn}.~1~")
 
-        sixth_backup = config.harvest_log_filename + ".~6~"
+        sixth_backup = fn + ".~6~"
         if os.path.exists(sixth_backup):
             os.unlink(sixth_backup)
 
-        self.data.write(
-            config.harvest_log_filename,
-            format=config.harvest_log_format,
-            overwrite=True,
-        )
+        # write to a temporary file, then atomically replace the log
+        tmp = config.harvest_log_filename + ".tmp"
+        self.data.write(tmp, format=config.harvest_log_format, overwrite=True)
+        os.replace(tmp, config.harvest_log_filename)
+        self._last_write = time.monotonic()
+
+    def maybe_write(self, interval: float = 30) -> None:
+        """Write harvest log data to the disk, at most once per interval.
+
+        Use for intermediate checkpoints; terminal states should use
+        ``write`` so that they are never skipped.
+
+
+        Parameters
+        ----------
+        interval : float, optional
+            Do not write if the last write was fewer than this many seconds
+            ago.
+
+        """
+
+        if time.monotonic() - self._last_write < interval:
+            return
+
+        self.write()
 
     def time_of_last(self) -> Time:
         """Get the time of the last file validation for the current target and source."""
@@ -86,14 +112,16 @@ class HarvestLog:
         if len(self.data) == 0:
             return Time(0, format="jd")
 
-        target = self.data["target"] == config.target
-        source = self.data["source"] == config.source
-        ingested = (self.data["time_of_last"] != "") * (
-            self.data["time_of_last"] != "0"
+        mask = (
+            (self.data["target"] == config.target)
+            & (self.data["source"] == config.source)
+            & (self.data["time_of_last"] != "")
+            & (self.data["time_of_last"] != "0")
         )
 
-        if not any(target * source * ingested):
+        idx = np.nonzero(mask)[0]
+        if len(idx) == 0:
             return Time(0, format="jd", precision=6)
 
-        last_good_run = self.data[target * source * ingested][-1]
+        last_good_run = self.data[idx[-1]]
         return Time(last_good_run["time_of_last"], precision=6)
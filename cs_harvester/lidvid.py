@@ -1,33 +1,46 @@
 from typing import Self
+from lxml import etree
 from packaging.version import Version
 from pds4_tools.reader.label_objects import Label
 from .exceptions import LabelError
 
 
+_LID_PATH = "Identification_Area/logical_identifier"
+_VID_PATH = "Identification_Area/version_id"
+_PRODUCT_CLASS_PATH = "Identification_Area/product_class"
+
+
 class LIDVID:
     """PDS4 logical identifier and version id parser."""
 
+    __slots__ = ("_lid", "_vid", "_parts", "_str")
+
     def __init__(self, lidvid: str) -> None:
         self._lid, self._vid = lidvid.split("::")
         if not self._lid.startswith("urn:nasa:pds"):
             raise ValueError(f"Invalid PDS4 LIDVID: {lidvid}")
+        self._parts = self._lid.split(":")
+        self._str = self._lid + "::" + self._vid
 
     @classmethod
     def from_label(cls, label: Label) -> Self:
         """Initialize from a PDS4 tools label object."""
-        lid = label.find("Identification_Area/logical_identifier").text
-        vid = label.find("Identification_Area/version_id").text
+        lid = label.find(_LID_PATH).text
+        vid = label.find(_VID_PATH).text
         return cls(lid + "::" + vid)
 
     def __str__(self) -> str:
-        return "::".join((self._lid, self._vid))
+        return self._str
 
     def __repr__(self) -> str:
         return f"<LIDVID: {str(self)}>"
 
     def __eq__(self, other: str | Self) -> bool:
         _other = other if isinstance(other, LIDVID) else LIDVID(other)
-        return str(self) == str(other)
+        return self._str == _other._str
+
+    def __hash__(self) -> int:
+        return hash(self._str)
 
     @property
     def logical_id(self) -> str:
@@ -42,22 +55,65 @@ class LIDVID:
 
     @property
     def bundle(self) -> str:
-        return self._lid.split(":")[3]
+        return self._parts[3]
 
     @property
     def collection(self) -> str:
-        return self._lid.split(":")[4]
+        return self._parts[4]
 
     @property
     def product_id(self) -> str:
-        return self._lid.split(":")[5]
+        return self._parts[5]
+
+
+def lidvid_from_file(fn: str) -> LIDVID:
+    """Get the LIDVID from a PDS4 label file.
+
+    The file is streamed with ``lxml.etree.iterparse`` and reading stops
+    once the Identification_Area's logical_identifier and version_id have
+    been seen, which avoids materializing the full label.
+
+    """
+
+    lid: str | None = None
+    vid: str | None = None
+    for _, element in etree.iterparse(
+        fn, events=("end",), tag=("{*}logical_identifier", "{*}version_id")
+    ):
+        if element.tag.endswith("logical_identifier"):
+            lid = lid or element.text
+        else:
+            vid = vid or element.text
+        element.clear()
+        if lid is not None and vid is not None:
+            break
+
+    if lid is None or vid is None:
+        raise LabelError(f"logical_identifier and version_id not found in {fn}")
+
+    return LIDVID(lid + "::" + vid)
+
+
+def collection_version_from_file(fn: str) -> Version:
+    """Get the collection version from a PDS4 label file.
+
+    The file is streamed with ``lxml.etree.iterparse`` and reading stops at
+    the first version_id element (i.e., that of the Identification_Area),
+    which avoids materializing the full label.
+
+    """
+
+    for _, element in etree.iterparse(fn, events=("end",), tag="{*}version_id"):
+        version = Version(element.text)
+        element.clear()
+        return version
+
+    raise LabelError(f"version_id not found in {fn}")
 
 
 def collection_version(label: Label) -> Version:
     """Get the collection version."""
-    is_collection = (
-        label.find("Identification_Area/product_class").text == "Product_Collection"
-    )
+    is_collection = label.find(_PRODUCT_CLASS_PATH).text == "Product_Collection"
     if not is_collection:
         raise LabelError("This does not appear to be a collection label.")
     return Version(LIDVID.from_label(label).vid)
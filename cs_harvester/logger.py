@@ -2,6 +2,7 @@ import os
 import sys
 import shlex
 import logging
+import functools
 
 # version info
 from astropy import __version__ as astropy_version
@@ -11,6 +12,7 @@ from sbpy import __version__ as sbpy_version
 from sbsearch import __version__ as sbsearch_version
 
 
+@functools.cache
 def get_logger():
     from . import config
 
@@ -4,18 +4,41 @@ Set HTTP User-Agent parameter.
 
 from contextlib import contextmanager
 import requests as req
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from astropy.utils.data import conf as astropy_conf
 from . import __version__
 
 
 user_agent = f"CATCH-SIS Harvester {__version__}"
 
+_session: req.Session | None = None
+
+
+def get_session() -> req.Session:
+    """A shared session with connection pooling and automatic retries."""
+
+    global _session
+
+    if _session is None:
+        _session = req.Session()
+        _session.headers.update({"User-Agent": user_agent})
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=4, backoff_factor=1, status_forcelist=(500, 502, 503, 504)
+            ),
+        )
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+
+    return _session
+
 
 @contextmanager
 def session():
-    with req.Session() as s:
-        s.headers.update({"User-Agent": user_agent})
-        yield s
+    yield get_session()
 
 
 @contextmanager
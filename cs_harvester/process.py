@@ -2,20 +2,21 @@
 Get metadata from a label.
 """
 
+import re
+from datetime import datetime
+
 import numpy as np
 from astropy.time import Time
 from pds4_tools.reader.label_objects import Label
 
 from catch.model import Observation, Spacewatch
 from catch.model.atlas import (
-    ATLAS,
     ATLASMaunaLoa,
     ATLASHaleakela,
     ATLASRioHurtado,
     ATLASSutherland,
 )
 from catch.model.catalina import (
-    CatalinaSkySurvey,
     CatalinaBigelow,
     CatalinaLemmon,
     CatalinaBokNEOSurvey,
@@ -23,7 +24,108 @@ from catch.model.catalina import (
 from .lidvid import LIDVID
 
 
-def process(label: Label, source: str, update: Observation | None = None):
+_ATLAS_TEL = {
+    "01": ATLASMaunaLoa,
+    "02": ATLASHaleakela,
+    "03": ATLASSutherland,
+    "04": ATLASRioHurtado,
+}
+_BIGELOW_TELESCOPES = frozenset(CatalinaBigelow._telescopes)
+_LEMMON_TELESCOPES = frozenset(CatalinaLemmon._telescopes)
+_BOK_TELESCOPES = frozenset(CatalinaBokNEOSurvey._telescopes)
+
+
+def _atlas_cls(lidvid: LIDVID) -> type[Observation]:
+    # example LID: urn:nasa:pds:gbo.ast.atlas.survey:59613:01a59613o0586o_fits
+    return _ATLAS_TEL[lidvid.product_id[:2]]
+
+
+def _spacewatch_cls(lidvid: LIDVID) -> type[Observation]:
+    return Spacewatch
+
+
+def _css_cls(lidvid: LIDVID) -> type[Observation]:
+    tel = lidvid.product_id[:3].upper()
+    if tel in _BIGELOW_TELESCOPES:
+        return CatalinaBigelow
+    if tel in _LEMMON_TELESCOPES:
+        return CatalinaLemmon
+    if tel in _BOK_TELESCOPES:
+        return CatalinaBokNEOSurvey
+    return Observation
+
+
+_SURVEY_CLS = {
+    "gbo.ast.atlas.survey": _atlas_cls,
+    "gbo.ast.spacewatch.survey": _spacewatch_cls,
+    "gbo.ast.catalina.survey": _css_cls,
+}
+
+_SOURCE_BUNDLE = {
+    "atlas": "gbo.ast.atlas.survey",
+    "spacewatch": "gbo.ast.spacewatch.survey",
+    "css": "gbo.ast.catalina.survey",
+}
+
+_START_TIME_PATH = "Observation_Area/Time_Coordinates/start_date_time"
+_STOP_TIME_PATH = "Observation_Area/Time_Coordinates/stop_date_time"
+_IMAGING_PATH = "Observation_Area/Discipline_Area/img:Imaging"
+_EXPOSURE_PATH = _IMAGING_PATH + "/img:Exposure/img:exposure_duration"
+_EXPOSURE_ANY_PATH = ".//img:Exposure/img:exposure_duration"
+_FILTER_PATH = _IMAGING_PATH + "/img:Optical_Filter/img:filter_name"
+_FILTER_ANY_PATH = ".//img:Optical_Filter/img:filter_name"
+_SURVEY_PATH = "Observation_Area/Discipline_Area/survey:Survey"
+_SURVEY_ANY_PATH = ".//survey:Survey"
+_NSIGMA_MAGLIMIT_PATH = ".//survey:N_Sigma_Limit/survey:limiting_magnitude"
+_ROLLOVER_MAGLIMIT_PATH = ".//survey:Rollover/survey:rollover_magnitude"
+_PERCENTAGE_MAGLIMIT_PATH = (
+    "survey:Limiting_Magnitudes"
+    "/survey:Percentage_Limit[survey:Percentage_Limit='50']"
+    "/survey:limiting_magnitude"
+)
+_CORNER_POSITION_PATH = "survey:Image_Corners/survey:Corner_Position"
+_CORNERS = ("Top Left", "Top Right", "Bottom Right", "Bottom Left")
+_FIELD_ID_PATH = "survey:field_id"
+_DERIVED_LID_PATH = (
+    "Reference_List/Internal_Reference"
+    "[reference_type='data_to_derived_product']/lid_reference"
+)
+_FILE_NAME_PATH = "File_Area_Observational/File/file_name"
+_FILE_NAME_ANY_PATH = ".//File_Area_Observational/File/file_name"
+
+_FITS_SUFFIX = re.compile(r"fits\Z")
+
+# proleptic Gregorian ordinal of the modified Julian date epoch, 1858-11-17
+_MJD_EPOCH_ORDINAL = 678576
+
+
+def _iso_to_mjd(date_time: str) -> float:
+    """Convert an ISO 8601 UTC time string to a modified Julian date.
+
+    ``datetime.fromisoformat`` covers the PDS4 date_time formats directly;
+    anything else falls back to astropy.
+
+    """
+
+    try:
+        dt = datetime.fromisoformat(date_time)
+    except ValueError:
+        return Time(date_time).mjd
+
+    seconds = dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond * 1e-6
+    offset = dt.utcoffset()
+    if offset is not None:
+        seconds -= offset.total_seconds()
+
+    return dt.toordinal() - _MJD_EPOCH_ORDINAL + seconds / 86400
+
+
+def process(
+    label: Label,
+    source: str,
+    update: Observation | None = None,
+    mjd_added: float | None = None,
+):
     """Get common metadata from a PDS4 label.
 
 
@@ -38,6 +140,11 @@ def process(label: Label, source: str, update: Observation | None = None):
     update : Observation, optional
         If defined, then this observation is updated and returned.
 
+    mjd_added : float, optional
+        The time the observation is added to the database, as a modified
+        Julian date.  Drivers processing a batch of labels should compute
+        this once and pass it in; the default computes it per label.
+
 
     Returns
     -------
@@ -51,100 +158,89 @@ def process(label: Label, source: str, update: Observation | None = None):
     lidvid = LIDVID.from_label(label)
 
     # use the label to determine which data model object to use
-    cls: Observation = Observation
-    if lidvid.bundle.startswith("gbo.ast.atlas.survey"):
-        # example LID: urn:nasa:pds:gbo.ast.atlas.survey:59613:01a59613o0586o_fits
-        tel = lidvid.product_id[:2]
-        cls = {
-            "01": ATLASMaunaLoa,
-            "02": ATLASHaleakela,
-            "03": ATLASSutherland,
-            "04": ATLASRioHurtado,
-        }[tel]
-    elif lidvid.bundle.startswith("gbo.ast.spacewatch.survey"):
-        cls = Spacewatch
-    elif lidvid.bundle.startswith("gbo.ast.catalina.survey"):
-        tel = lidvid.product_id[:3].upper()
-        if tel in CatalinaBigelow._telescopes:
-            cls = CatalinaBigelow
-        elif tel in CatalinaLemmon._telescopes:
-            cls = CatalinaLemmon
-        elif tel in CatalinaBokNEOSurvey._telescopes:
-            cls = CatalinaBokNEOSurvey
+    dispatch = _SURVEY_CLS.get(lidvid.bundle)
+    cls: type[Observation] = Observation if dispatch is None else dispatch(lidvid)
 
     if update is not None:
         obs = update
     else:
         obs = cls()
 
-    # verify observation model
-    if source == "atlas" and not isinstance(obs, ATLAS):
-        raise ValueError("Expected an ATLAS label")
-    elif source == "spacewatch" and not isinstance(obs, Spacewatch):
-        raise ValueError("Expected a Spacewatch label")
-    elif source == "css" and not isinstance(obs, CatalinaSkySurvey):
-        raise ValueError("Expected a Catalina Sky Survey label")
-
-    obs.product_id = str(lidvid.lid)
-    obs.mjd_start = Time(
-        label.find("Observation_Area/Time_Coordinates/start_date_time").text
-    ).mjd
-    obs.mjd_stop = Time(
-        label.find("Observation_Area/Time_Coordinates/stop_date_time").text
-    ).mjd
-
-    exposure = label.find(".//img:Exposure/img:exposure_duration")
+    # verify the label comes from the expected source; a recognized source
+    # must also resolve to its survey-specific model (e.g., an unknown
+    # Catalina telescope code falls through to the base Observation)
+    expected_bundle = _SOURCE_BUNDLE.get(source)
+    if expected_bundle is not None and (
+        lidvid.bundle != expected_bundle or cls is Observation
+    ):
+        raise ValueError(f"Expected a {source} label: {lidvid}")
+
+    obs.product_id = lidvid.lid
+    obs.mjd_start = _iso_to_mjd(label.findtext(_START_TIME_PATH))
+    obs.mjd_stop = _iso_to_mjd(label.findtext(_STOP_TIME_PATH))
+
+    exposure = label.findtext(_EXPOSURE_PATH)
+    if exposure is None:
+        exposure = label.findtext(_EXPOSURE_ANY_PATH)
+
     if exposure is None:
         obs.exposure = round((obs.mjd_stop - obs.mjd_start) * 86400, 3)
     else:
-        obs.exposure = float(exposure.text)
-
-    filter = label.find(".//img:Optical_Filter/img:filter_name")
-    obs.filter = None if filter is None else filter.text
-
-    survey = label.find(".//survey:Survey")
-    ra, dec = [], []
-    for corner in ("Top Left", "Top Right", "Bottom Right", "Bottom Left"):
-        coordinate = survey.find(
-            "survey:Image_Corners"
-            f"/survey:Corner_Position[survey:corner_identification='{corner}']"
-            "/survey:Coordinate"
-        )
-        ra.append(float(coordinate.find("survey:right_ascension").text))
-        dec.append(float(coordinate.find("survey:declination").text))
-    obs.set_fov(ra, dec)
-
-    maglimit = survey.find(".//survey:N_Sigma_Limit/survey:limiting_magnitude")
-    if maglimit is not None:
-        obs.maglimit = float(maglimit.text)
+        obs.exposure = float(exposure)
 
-    maglimit = survey.find(".//survey:Rollover/survey:rollover_magnitude")
-    if maglimit is not None:
-        obs.maglimit = float(maglimit.text)
+    obs.filter = label.findtext(_FILTER_PATH)
+    if obs.filter is None:
+        obs.filter = label.findtext(_FILTER_ANY_PATH)
 
-    maglimit = survey.find(
-        "survey:Limiting_Magnitudes"
-        "/survey:Percentage_Limit[survey:Percentage_Limit='50']"
-        "/survey:limiting_magnitude"
-    )
-    if maglimit is not None:
-        obs.maglimit = float(maglimit.text)
-
-    obs.mjd_added = Time.now().mjd
+    if cls is Observation:
+        # unknown survey: there is no survey discipline area to harvest
+        survey = None
+    else:
+        survey = label.find(_SURVEY_PATH)
+        if survey is None:
+            # not at the usual location; search the whole label
+            survey = label.find(_SURVEY_ANY_PATH)
+
+    if survey is not None:
+        # collect the corner positions with one traversal rather than a
+        # predicated search per corner
+        corners = {
+            cp.findtext("survey:corner_identification"): cp
+            for cp in survey.findall(_CORNER_POSITION_PATH)
+        }
+        radec = np.empty((4, 2))
+        for i, corner in enumerate(_CORNERS):
+            coordinate = corners[corner].find("survey:Coordinate")
+            radec[i, 0] = float(coordinate.findtext("survey:right_ascension"))
+            radec[i, 1] = float(coordinate.findtext("survey:declination"))
+        obs.set_fov(radec[:, 0], radec[:, 1])
+
+        # each survey publishes at most one of these forms; stop at the first
+        for path in (
+            _NSIGMA_MAGLIMIT_PATH,
+            _ROLLOVER_MAGLIMIT_PATH,
+            _PERCENTAGE_MAGLIMIT_PATH,
+        ):
+            maglimit = survey.findtext(path)
+            if maglimit is not None:
+                obs.maglimit = float(maglimit)
+                break
+
+    obs.mjd_added = Time.now().mjd if mjd_added is None else mjd_added
 
     # survey specific sections here
-    if isinstance(obs, ATLAS):
-        obs.field_id = survey.find("survey:field_id").text
+    if lidvid.bundle == "gbo.ast.atlas.survey":
+        obs.field_id = survey.findtext(_FIELD_ID_PATH)
 
         # is there a diff image?
-        derived_lids = label.findall(
-            "Reference_List/Internal_Reference[reference_type='data_to_derived_product']/lid_reference"
-        )
-        expected_diff_lid = lidvid.lid[:-4] + "diff"  # replace fits with diff
+        derived_lids = label.findall(_DERIVED_LID_PATH)
+        expected_diff_lid = _FITS_SUFFIX.sub("diff", lidvid.lid, count=1)
         obs.diff = any(
-            [derived_lid.text == expected_diff_lid for derived_lid in derived_lids]
+            derived_lid.text == expected_diff_lid for derived_lid in derived_lids
         )
-    elif isinstance(obs, Spacewatch):
-        obs.file_name = label.find(".//File_Area_Observational/File/file_name").text
+    elif lidvid.bundle == "gbo.ast.spacewatch.survey":
+        obs.file_name = label.findtext(_FILE_NAME_PATH)
+        if obs.file_name is None:
+            obs.file_name = label.findtext(_FILE_NAME_ANY_PATH)
 
     return obs